@@ -1,12 +1,18 @@
 import os
 import io
-import base64
-from flask import Flask, render_template, request, jsonify, send_file
+import hashlib
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from diskcache import Cache
+from flask import Flask, render_template, request, jsonify, send_file, url_for, abort
 import json
-from flask_cv_analyzer import CVAnalyzer
+from flask_cv_analyzer import CVAnalyzer, PLOTTERS, AI_MODEL, keyword_automaton
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from collections import Counter
 from datetime import datetime
@@ -24,14 +30,109 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-def create_plot_base64(fig):
-    """Convert matplotlib figure to base64 string"""
+# Persistent LRU cache of analysis results, keyed by upload content hash.
+# Entries hold CV-derived data (summary, top words, AI insights, charts), so
+# they expire after CACHE_TTL instead of living until evicted.
+app.config['CACHE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], '.cache')
+CACHE_TTL = 24 * 60 * 60  # seconds
+analysis_cache = Cache(
+    app.config['CACHE_FOLDER'],
+    size_limit=512 * 1024 * 1024,
+    eviction_policy='least-recently-used'
+)
+
+# Keyword categories tracked for every CV
+KEYWORD_LISTS = {
+    "Programming Languages": ["python", "sql", "java", "javascript", "r", "scala", "c++", "c#"],
+    "Data & Analytics": ["data", "analytics", "machine learning", "ai", "statistics", "visualization", "tableau", "power bi"],
+    "Cloud Platforms": ["aws", "azure", "gcp", "google cloud", "cloud"],
+    "Databases": ["mysql", "postgresql", "mongodb", "oracle", "sql server", "redis"],
+    "Management Skills": ["leadership", "project management", "team", "strategy", "planning"],
+    "Technical Skills": ["api", "microservices", "docker", "kubernetes", "git", "ci/cd"]
+}
+# Build the keyword matcher at import so the first upload doesn't pay for it
+keyword_automaton(KEYWORD_LISTS)
+
+# Response fields holding chart URLs, and the plotter kind behind each
+CHART_FIELDS = {
+    'word_cloud': 'word_cloud',
+    'top_words_chart': 'top_words',
+    'year_mentions_chart': 'year_mentions',
+    'keyword_chart': 'keywords'
+}
+
+# Charts render concurrently in worker processes; savefig dominates /upload latency.
+# Workers start lazily from a threaded server, so never fork this process
+# directly (a child could inherit locks held by the request/AI threads).
+_MP_START = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+PLOT_TIMEOUT = 60  # seconds to wait on the pool before rendering in-process
+
+def _new_plot_pool():
+    return ProcessPoolExecutor(max_workers=4, mp_context=multiprocessing.get_context(_MP_START))
+
+_PLOT_POOL = _new_plot_pool()
+_PLOT_POOL_LOCK = threading.Lock()
+# OpenAI calls are network-bound, so they overlap chart rendering in threads
+_AI_POOL = ThreadPoolExecutor(max_workers=4)
+AI_TIMEOUT = 30  # seconds
+
+def create_plot_png(fig, dpi=100):
+    """Convert matplotlib figure to PNG bytes"""
     img_buffer = io.BytesIO()
-    fig.savefig(img_buffer, format='png', bbox_inches='tight', dpi=150)
-    img_buffer.seek(0)
-    img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-    plt.close(fig)
-    return img_base64
+    # Fast zlib level; the default (6) is most of the PNG encode time
+    fig.savefig(img_buffer, format='png', dpi=dpi, pil_kwargs={'compress_level': 1})
+    return img_buffer.getvalue()
+
+def _render_png(kind, data, dpi=100):
+    """Build and encode one chart (normally inside a _PLOT_POOL worker)"""
+    return create_plot_png(PLOTTERS[kind](data), dpi=dpi)
+
+def _replace_plot_pool(broken):
+    """Swap in a fresh pool once a worker has died and broken the current one"""
+    global _PLOT_POOL
+    with _PLOT_POOL_LOCK:
+        if _PLOT_POOL is broken:
+            _PLOT_POOL = _new_plot_pool()
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def render_charts(chart_data):
+    """Render {response field: chart data} to {response field: PNG bytes}.
+    
+    Charts render in _PLOT_POOL. Any chart the pool can't deliver, because a
+    worker died or nothing finished within PLOT_TIMEOUT, is rendered in-process.
+    """
+    jobs = {name: (CHART_FIELDS[name], data) for name, data in chart_data.items() if data is not None}
+    pngs = {}
+    pool = _PLOT_POOL
+    try:
+        futures = {pool.submit(_render_png, kind, data): name for name, (kind, data) in jobs.items()}
+        for future in as_completed(futures, timeout=PLOT_TIMEOUT):
+            pngs[futures[future]] = future.result()
+    except BrokenProcessPool:
+        print("Plot worker died, restarting the plot pool")
+        _replace_plot_pool(pool)
+    except TimeoutError:
+        print("Plot workers timed out, rendering remaining charts in-process")
+        for future in futures:
+            future.cancel()
+    
+    for name, (kind, data) in jobs.items():
+        if name not in pngs:
+            pngs[name] = _render_png(kind, data)
+    return pngs
+
+def upload_digest(file_bytes, filename):
+    """Hash the uploaded bytes (and name, which appears in the charts) into a cache id"""
+    digest = hashlib.blake2b(file_bytes, digest_size=16)
+    digest.update(filename.encode('utf-8', errors='ignore'))
+    return digest.hexdigest()
+
+def _plots_cached(response):
+    """Check that every chart URL in a cached response can still be served"""
+    return all(
+        f"plot:{response[name].rsplit('/', 1)[-1]}" in analysis_cache
+        for name in CHART_FIELDS if response.get(name)
+    )
 
 @app.route('/')
 def index():
@@ -47,68 +148,127 @@ def upload_file():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Save uploaded file
+        # AI analysis uses mock data if no API key is configured
+        openai_api_key = os.environ.get('OPENAI_API_KEY')
+        
+        # Identical uploads return the cached analysis. Mock-backed results are
+        # cached apart from real ones so configuring a key takes effect at once.
         filename = file.filename
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        file_bytes = file.read()
+        digest = upload_digest(file_bytes, filename)
+        ai_source = AI_MODEL if openai_api_key else 'mock'
+        cache_key = f"analysis:{digest}:{ai_source}"
+        cached = analysis_cache.get(cache_key)
+        if cached is not None and _plots_cached(cached):
+            return jsonify(cached)
+        
+        # Analyze CV straight from memory; the upload never touches disk
+        analyzer = CVAnalyzer(file_bytes, file_name=os.path.basename(filename))
         
-        # Analyze CV
-        analyzer = CVAnalyzer(filepath)
+        # Start AI analysis first so it overlaps chart rendering
+        ai_future = _AI_POOL.submit(
+            analyzer.get_ai_analysis,
+            api_key=openai_api_key, cache=analysis_cache, cache_expire=CACHE_TTL,
+            request_timeout=AI_TIMEOUT
+        )
         
         # Get summary
         summary = analyzer.get_summary()
         
-        # Generate word cloud
-        word_cloud = analyzer.generate_word_cloud_figure()
-        word_cloud_b64 = create_plot_base64(word_cloud)
-        
-        # Generate top words chart
-        top_words_fig = analyzer.plot_top_words_figure()
-        top_words_b64 = create_plot_base64(top_words_fig)
-        
-        # Generate year mentions chart
-        year_mentions_fig = analyzer.plot_year_mentions_figure()
-        year_mentions_b64 = create_plot_base64(year_mentions_fig) if year_mentions_fig else None
-        
         # Get keyword analysis
-        keyword_lists = {
-            "Programming Languages": ["python", "sql", "java", "javascript", "r", "scala", "c++", "c#"],
-            "Data & Analytics": ["data", "analytics", "machine learning", "ai", "statistics", "visualization", "tableau", "power bi"],
-            "Cloud Platforms": ["aws", "azure", "gcp", "google cloud", "cloud"],
-            "Databases": ["mysql", "postgresql", "mongodb", "oracle", "sql server", "redis"],
-            "Management Skills": ["leadership", "project management", "team", "strategy", "planning"],
-            "Technical Skills": ["api", "microservices", "docker", "kubernetes", "git", "ci/cd"]
-        }
+        keyword_results = analyzer.analyze_keywords_data(KEYWORD_LISTS)
         
-        keyword_results = analyzer.analyze_keywords_data(keyword_lists)
-        keyword_chart_fig = analyzer.plot_keywords_figure(keyword_lists)
-        keyword_chart_b64 = create_plot_base64(keyword_chart_fig)
+        # Render all charts in parallel (None data means the chart is skipped)
+        chart_data = {
+            'word_cloud': analyzer.word_cloud_data(),
+            'top_words_chart': analyzer.top_words_data(),
+            'year_mentions_chart': analyzer.year_mentions_data(),
+            'keyword_chart': analyzer.keywords_chart_data(KEYWORD_LISTS, results=keyword_results)
+        }
+        # PNGs are cached and served by URL rather than inlined as base64
+        charts = dict.fromkeys(chart_data)
+        for name, png in render_charts(chart_data).items():
+            plot_name = f"{digest}_{CHART_FIELDS[name]}.png"
+            analysis_cache.set(f"plot:{plot_name}", png, expire=CACHE_TTL)
+            charts[name] = url_for('cached_plot', name=plot_name)
         
         # Get top words data for table
-        top_words_data = analyzer.word_counts.most_common(20)
+        top_words_data = analyzer.most_common_20
         
-        # Get AI analysis (will use mock data if no API key)
-        openai_api_key = os.environ.get('OPENAI_API_KEY')
-        ai_analysis = analyzer.get_ai_analysis(api_key=openai_api_key)
+        # Collect AI analysis; a slow API falls back to the mock insights
+        try:
+            ai_analysis, ai_is_fallback = ai_future.result(timeout=AI_TIMEOUT)
+        except TimeoutError:
+            ai_analysis, ai_is_fallback = analyzer.get_mock_ai_analysis(), True
         
-        # Clean up uploaded file
-        os.remove(filepath)
-        
-        return jsonify({
+        response = {
             'success': True,
             'summary': summary,
-            'word_cloud': word_cloud_b64,
-            'top_words_chart': top_words_b64,
-            'year_mentions_chart': year_mentions_b64,
-            'keyword_chart': keyword_chart_b64,
+            **charts,
             'keyword_results': keyword_results,
             'top_words_data': top_words_data,
             'ai_analysis': ai_analysis
-        })
+        }
+        # Don't pin a fallback answer from a failed AI call to this file
+        if not openai_api_key or not ai_is_fallback:
+            analysis_cache.set(cache_key, response, expire=CACHE_TTL)
+        
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/cache/<name>')
+def cached_plot(name):
+    png = analysis_cache.get(f"plot:{name}")
+    if png is None:
+        abort(404)
+    return send_file(io.BytesIO(png), mimetype='image/png', max_age=3600)
+
+# PDF report styles, built once and shared by every report
+_STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    alignment=TA_CENTER,
+    textColor=colors.HexColor('#2563eb')
+)
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=16,
+    spaceAfter=12,
+    spaceBefore=20,
+    textColor=colors.HexColor('#1f2937')
+)
+NORMAL_STYLE = _STYLES['Normal']
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
+])
+
+# PDF reports build in the background; the client polls /pdf/<job_id>.
+# A single worker keeps ReportLab builds off the request threads without
+# running them concurrently.
+_PDF_POOL = ThreadPoolExecutor(max_workers=1)
+_PDF_JOBS = {}  # job_id -> (future, download name, submitted at)
+PDF_JOB_TTL = 10 * 60  # seconds an unclaimed report is kept
+
+def _prune_pdf_jobs():
+    """Forget finished reports nobody came back for"""
+    cutoff = time.time() - PDF_JOB_TTL
+    for job_id, (future, _, submitted) in list(_PDF_JOBS.items()):
+        if future.done() and submitted < cutoff:
+            _PDF_JOBS.pop(job_id, None)
+
 def generate_pdf_report(analysis_data, filename):
     """Generate a professional PDF report from analysis data"""
     # Create PDF in memory
@@ -116,38 +276,18 @@ def generate_pdf_report(analysis_data, filename):
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []
     
-    # Get styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#2563eb')
-    )
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor=colors.HexColor('#1f2937')
-    )
-    normal_style = styles['Normal']
-    
     # Title
-    story.append(Paragraph("CV Analysis Report", title_style))
+    story.append(Paragraph("CV Analysis Report", TITLE_STYLE))
     story.append(Spacer(1, 20))
     
     # Report metadata
-    story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", normal_style))
-    story.append(Paragraph(f"<b>Filename:</b> {filename}", normal_style))
+    story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", NORMAL_STYLE))
+    story.append(Paragraph(f"<b>Filename:</b> {filename}", NORMAL_STYLE))
     story.append(Spacer(1, 20))
     
     # Summary Statistics
     if 'summary' in analysis_data:
-        story.append(Paragraph("Executive Summary", heading_style))
+        story.append(Paragraph("Executive Summary", HEADING_STYLE))
         summary_data = [
             ['Metric', 'Value'],
             ['Total Words', f"{analysis_data['summary']['total_words']:,}"],
@@ -157,16 +297,7 @@ def generate_pdf_report(analysis_data, filename):
         ]
         
         summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
-        ]))
+        summary_table.setStyle(TABLE_STYLE)
         story.append(summary_table)
         story.append(Spacer(1, 20))
     
@@ -175,12 +306,12 @@ def generate_pdf_report(analysis_data, filename):
         ai_data = analysis_data['ai_analysis']
         
         # Professional Summary
-        story.append(Paragraph("AI Professional Summary", heading_style))
-        story.append(Paragraph(ai_data.get('professional_summary', 'N/A'), normal_style))
+        story.append(Paragraph("AI Professional Summary", HEADING_STYLE))
+        story.append(Paragraph(ai_data.get('professional_summary', 'N/A'), NORMAL_STYLE))
         story.append(Spacer(1, 15))
         
         # Experience Assessment
-        story.append(Paragraph("Experience Assessment", heading_style))
+        story.append(Paragraph("Experience Assessment", HEADING_STYLE))
         exp_data = [
             ['Assessment', 'Rating'],
             ['Experience Level', ai_data.get('experience_level', 'N/A')],
@@ -189,60 +320,42 @@ def generate_pdf_report(analysis_data, filename):
         ]
         
         exp_table = Table(exp_data)
-        exp_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
-        ]))
+        exp_table.setStyle(TABLE_STYLE)
         story.append(exp_table)
         story.append(Spacer(1, 20))
         
         # Key Strengths
-        story.append(Paragraph("Key Strengths", heading_style))
+        story.append(Paragraph("Key Strengths", HEADING_STYLE))
         for i, strength in enumerate(ai_data.get('key_strengths', []), 1):
-            story.append(Paragraph(f"{i}. {strength}", normal_style))
+            story.append(Paragraph(f"{i}. {strength}", NORMAL_STYLE))
         story.append(Spacer(1, 15))
         
         # Areas to Clarify
-        story.append(Paragraph("Areas to Clarify in Interview", heading_style))
+        story.append(Paragraph("Areas to Clarify in Interview", HEADING_STYLE))
         for i, flag in enumerate(ai_data.get('red_flags', []), 1):
-            story.append(Paragraph(f"{i}. {flag}", normal_style))
+            story.append(Paragraph(f"{i}. {flag}", NORMAL_STYLE))
         story.append(Spacer(1, 15))
         
         # Cultural Fit Indicators
-        story.append(Paragraph("Cultural Fit Assessment", heading_style))
+        story.append(Paragraph("Cultural Fit Assessment", HEADING_STYLE))
         cultural_data = [['Trait', 'Rating']]
         for trait, rating in ai_data.get('cultural_fit_indicators', {}).items():
             cultural_data.append([trait.replace('_', ' ').title(), rating])
         
         cultural_table = Table(cultural_data)
-        cultural_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
-        ]))
+        cultural_table.setStyle(TABLE_STYLE)
         story.append(cultural_table)
         story.append(Spacer(1, 20))
         
         # Interview Questions
-        story.append(Paragraph("Suggested Interview Questions", heading_style))
+        story.append(Paragraph("Suggested Interview Questions", HEADING_STYLE))
         for i, question in enumerate(ai_data.get('interview_questions', []), 1):
-            story.append(Paragraph(f"{i}. {question}", normal_style))
+            story.append(Paragraph(f"{i}. {question}", NORMAL_STYLE))
         story.append(Spacer(1, 20))
         
         # HR Recommendation
-        story.append(Paragraph("HR Recommendation", heading_style))
-        story.append(Paragraph(ai_data.get('hr_recommendation', 'N/A'), normal_style))
+        story.append(Paragraph("HR Recommendation", HEADING_STYLE))
+        story.append(Paragraph(ai_data.get('hr_recommendation', 'N/A'), NORMAL_STYLE))
     
     # Build PDF
     doc.build(story)
@@ -259,24 +372,49 @@ def generate_pdf():
         
         filename = data.get('filename', 'Unknown CV')
         
-        # Generate PDF
-        pdf_buffer = generate_pdf_report(data, filename)
-        
         # Create safe filename for download
         safe_filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_')).rstrip()
         pdf_filename = f"CV_Analysis_Report_{safe_filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=pdf_filename,
-            mimetype='application/pdf'
-        )
+        # Generate PDF in the background
+        _prune_pdf_jobs()
+        job_id = uuid.uuid4().hex
+        future = _PDF_POOL.submit(generate_pdf_report, data, filename)
+        _PDF_JOBS[job_id] = (future, pdf_filename, time.time())
+        
+        return jsonify({
+            'job_id': job_id,
+            'status_url': url_for('pdf_job', job_id=job_id)
+        }), 202
         
     except Exception as e:
         print(f"PDF Generation error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/pdf/<job_id>')
+def pdf_job(job_id):
+    job = _PDF_JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired PDF job'}), 404
+    
+    future, pdf_filename, _ = job
+    if not future.done():
+        return jsonify({'status': 'pending'}), 202
+    
+    _PDF_JOBS.pop(job_id, None)
+    try:
+        pdf_buffer = future.result()
+    except Exception as e:
+        print(f"PDF Generation error: {e}")
+        return jsonify({'error': str(e)}), 500
+    
+    return send_file(
+        pdf_buffer,
+        as_attachment=True,
+        download_name=pdf_filename,
+        mimetype='application/pdf'
+    )
+
 @app.route('/export/<data_type>')
 def export_data(data_type):
     try:
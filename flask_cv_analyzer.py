@@ -1,15 +1,21 @@
 import os
 import re
 import io
+import hashlib
 import pdfplumber
-import PyPDF2
+import pypdfium2 as pdfium
 import docx
+import numpy as np
+import ahocorasick
 from wordcloud import WordCloud, STOPWORDS
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend for web
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from collections import Counter
 from datetime import datetime
+from functools import cached_property, lru_cache
+from itertools import islice
+from typing import BinaryIO
 from unidecode import unidecode
 import nltk
 import openai
@@ -25,6 +31,11 @@ from nltk.corpus import stopwords
 
 # Tokenization setup
 _TOKEN_RE = re.compile(r"[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*")
+# Same shape but Unicode-aware, so accented words arrive whole for folding.
+# Unicode hyphens/dashes, the minus sign and the soft hyphen also join, so
+# unidecode folds them as the old whole-text pass did ("end‑to‑end" stays one
+# token). Other symbols unidecode spells out (°, ™) are now dropped as separators.
+_WORD_RE = re.compile(r"[^\W_]+(?:[-_\u00ad\u2010-\u2015\u2212][^\W_]+)*")
 EN_STOP = set(stopwords.words("english"))
 
 # Custom stopwords for CV analysis
@@ -36,186 +47,324 @@ CUSTOM_STOP = {
     'built', 'created', 'skills', 'skill', 'abilities', 'ability', 
     'proficient', 'knowledge', 'strong', 'understanding', 'etc'
 }
+_BASE_STOP = frozenset(EN_STOP | CUSTOM_STOP)
+_WC_STOP = frozenset(STOPWORDS) | _BASE_STOP
 
-# Year extraction
-YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b|\b(19\d{2}|20\d{2})\s*(?:-|–|to)\s*(19\d{2}|20\d{2}|present|now)\b", re.IGNORECASE)
+# Model used for AI insights; part of the AI cache key
+AI_MODEL = "gpt-3.5-turbo"
 
-def read_txt(path: str) -> str:
-    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+# Year extraction (both ends of a "2015 - 2019" range match independently)
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+# Readers take either a file path or the file's raw bytes
+def _as_file(source: str | bytes):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+def read_txt(source: str | bytes) -> str:
+    if isinstance(source, bytes):
+        return source.decode('utf-8', errors='ignore')
+    with open(source, 'r', encoding='utf-8', errors='ignore') as f:
         return f.read()
 
-def read_docx(path: str) -> str:
-    d = docx.Document(path)
+def read_docx(source: str | bytes) -> str:
+    d = docx.Document(_as_file(source))
     return "\n".join(p.text for p in d.paragraphs)
 
-def read_pdf(path: str) -> str:
-    # Primary: pdfplumber; fallback: PyPDF2
+def _read_pdf_pdfium(source: str | bytes) -> str:
+    pdf = pdfium.PdfDocument(source)
     try:
         text = []
-        with pdfplumber.open(path) as pdf:
-            for page in pdf.pages:
-                text.append(page.extract_text() or "")
-        out = "\n".join(text)
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            text.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(text)
+    finally:
+        pdf.close()
+
+def read_pdf(source: str | bytes) -> str:
+    # Primary: pypdfium2 (fast text-only extraction); fallback: pdfplumber
+    try:
+        out = _read_pdf_pdfium(source)
         if out.strip():
             return out
     except Exception as e:
-        print(f"pdfplumber failed: {e}, trying PyPDF2...")
+        print(f"pypdfium2 failed: {e}, trying pdfplumber...")
     
+    # Text-only extraction: extract_text_simple skips the layout-aware
+    # word/line clustering that extract_text runs on every page
     text = []
-    with open(path, 'rb') as f:
-        reader = PyPDF2.PdfReader(f)
-        for p in reader.pages:
-            text.append(p.extract_text() or "")
+    with pdfplumber.open(_as_file(source)) as pdf:
+        for page in pdf.pages:
+            text.append(page.extract_text_simple() or "")
+            page.flush_cache()
     return "\n".join(text)
 
-def read_any(path: str) -> str:
-    ext = os.path.splitext(path.lower())[1]
+def read_any(source: str | bytes | BinaryIO, file_name: str = None) -> str:
+    """Read text from a path, raw bytes or a binary file-like object.
+    
+    The format is picked from ``file_name`` (or the path's extension).
+    """
+    if not isinstance(source, (str, bytes)):
+        source = source.read()
+    ext = os.path.splitext((file_name or (source if isinstance(source, str) else "")).lower())[1]
     if ext == ".pdf":
-        return read_pdf(path)
+        return read_pdf(source)
     elif ext == ".docx":
-        return read_docx(path)
+        return read_docx(source)
     elif ext == ".txt":
-        return read_txt(path)
+        return read_txt(source)
     else:
         try:
-            return read_txt(path)
+            return read_txt(source)
         except:
             return ""
 
+def _iter_raw_tokens(text: str):
+    for word in _WORD_RE.findall(text):
+        if word.isascii():
+            yield word
+        else:
+            # Only non-ASCII words pay for unidecode ("Café" -> "Cafe")
+            yield from _TOKEN_RE.findall(unidecode(word))
+
 def tokenize(text: str, extra_stop: set = None):
-    text = unidecode(text or "")
-    text = re.sub(r"\s+", " ", text)
-    tokens = [t.lower() for t in _TOKEN_RE.findall(text)]
-    
-    # Remove pure numbers
-    tokens = [t for t in tokens if not t.isdigit()]
-    
-    # Apply stopwords
-    stop = EN_STOP.copy()
-    stop.update(CUSTOM_STOP)
+    stop = _BASE_STOP
     if extra_stop:
-        stop.update({w.lower() for w in extra_stop})
+        stop = stop | {w.lower() for w in extra_stop}
     
-    tokens = [t for t in tokens if t not in stop and len(t) > 2]
-    return tokens, text
+    # Single pass: lowercase, then drop short tokens, pure numbers and stopwords
+    tokens = [t for t in map(str.lower, _iter_raw_tokens(text or ""))
+              if len(t) > 2 and not t.isdigit() and t not in stop]
+    return tokens
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+@lru_cache(maxsize=8)
+def _keyword_automaton(frozen_keywords):
+    """Build an Aho-Corasick automaton mapping each phrase to its (category, keyword) pairs"""
+    automaton = ahocorasick.Automaton()
+    for category, keywords in frozen_keywords:
+        for keyword in keywords:
+            phrase = keyword.lower()
+            if not phrase:
+                continue
+            if phrase in automaton:
+                automaton.get(phrase)[1].append((category, keyword))
+            else:
+                automaton.add_word(phrase, (phrase, [(category, keyword)]))
+    if len(automaton):
+        automaton.make_automaton()
+    return automaton
+
+def _freeze_keywords(keyword_lists):
+    return tuple((category, tuple(keywords)) for category, keywords in keyword_lists.items())
+
+def keyword_automaton(keyword_lists):
+    """Return the (cached) automaton for a {category: [keywords]} mapping"""
+    return _keyword_automaton(_freeze_keywords(keyword_lists))
 
 def extract_year_mentions(raw_text: str):
-    years = []
-    found_patterns = YEAR_RE.findall(raw_text)
+    years = np.fromiter((int(y) for y in YEAR_RE.findall(raw_text)), dtype=np.int16)
+    years = years[(years >= 1950) & (years <= datetime.now().year + 1)]
+    return years.tolist()
+
+# Chart rendering. These take the plain data dicts built by CVAnalyzer so
+# they can run in worker processes (Figures don't pickle cleanly).
+@lru_cache(maxsize=8)
+def _render_cloud(frequencies, width, height, max_words):
+    """Lay out a word cloud and return its image array; cached per frequency tuple"""
+    cloud = WordCloud(
+        width=width, height=height,
+        background_color="white",
+        max_words=max_words
+    ).generate_from_frequencies(dict(frequencies))
+    return cloud.to_array()
+
+def plot_word_cloud(data):
+    """Generate word cloud and return matplotlib figure"""
+    cloud = _render_cloud(
+        tuple(sorted(data['frequencies'].items())),
+        data['width'], data['height'], data['max_words']
+    )
+    
+    fig = Figure(figsize=(16, 9), layout="constrained")
+    ax = fig.subplots()
+    ax.imshow(cloud, interpolation="bilinear", rasterized=True)
+    ax.axis("off")
+    ax.set_title(f"Word Cloud — {data['file_name']}", fontsize=16, pad=20)
+    return fig
+
+def plot_top_words(data):
+    """Generate top words chart and return matplotlib figure"""
+    words, counts = data['words'], data['counts']
+    
+    fig = Figure(figsize=(12, 8), layout="constrained")
+    ax = fig.subplots()
+    bars = ax.bar(range(len(words)), counts, color='skyblue')
+    ax.set_xlabel("Words", fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    ax.set_title(f"Top {data['n']} Words in {data['file_name']}", fontsize=14)
+    ax.set_xticks(range(len(words)))
+    ax.set_xticklabels(words, rotation=45, ha="right")
+    
+    # Add value labels on bars
+    ax.bar_label(bars, padding=2)
     
-    for pattern in found_patterns:
-        for year_str in pattern:
-            if year_str and year_str.lower() not in ("present", "now"):
-                try:
-                    y = int(year_str)
-                    if 1950 <= y <= datetime.now().year + 1:
-                        years.append(y)
-                except ValueError:
-                    pass
-    return years
+    return fig
+
+def plot_year_mentions(data):
+    """Generate year mentions chart and return matplotlib figure"""
+    years, counts = data['years'], data['counts']
+    
+    fig = Figure(figsize=(12, 6), layout="constrained")
+    ax = fig.subplots()
+    ax.plot(years, counts, marker='o', linewidth=2, markersize=8, color='orange')
+    ax.set_xlabel("Year", fontsize=12)
+    ax.set_ylabel("Number of Mentions", fontsize=12)
+    ax.set_title(f"Year Mentions in {data['file_name']}", fontsize=14)
+    ax.grid(True, alpha=0.3)
+    
+    # Add value labels on points
+    for year, count in zip(years, counts):
+        ax.text(year, count + 0.1, str(count), ha='center', va='bottom')
+    
+    return fig
+
+def plot_keywords(data):
+    """Generate keyword analysis chart and return matplotlib figure"""
+    keywords, counts = data['keywords'], data['counts']
+    
+    fig = Figure(figsize=(12, max(8, len(keywords) * 0.4)), layout="constrained")
+    ax = fig.subplots()
+    bars = ax.barh(range(len(keywords)), counts, color='lightcoral')
+    ax.set_xlabel("Frequency", fontsize=12)
+    ax.set_ylabel("Keywords", fontsize=12)
+    ax.set_title(f"Keyword Analysis for {data['file_name']}", fontsize=14)
+    ax.set_yticks(range(len(keywords)))
+    ax.set_yticklabels(keywords)
+    ax.invert_yaxis()
+    
+    # Add value labels
+    ax.bar_label(bars, padding=2)
+    
+    return fig
+
+PLOTTERS = {
+    'word_cloud': plot_word_cloud,
+    'top_words': plot_top_words,
+    'year_mentions': plot_year_mentions,
+    'keywords': plot_keywords
+}
 
 class CVAnalyzer:
-    def __init__(self, file_path: str):
-        self.file_path = file_path
-        self.file_name = os.path.basename(file_path)
-        self.raw_text = read_any(file_path)
-        self.tokens, self.normalized_text = tokenize(self.raw_text)
-        self.word_counts = Counter(self.tokens)
+    def __init__(self, source: str | bytes | BinaryIO, file_name: str = None):
+        """Analyze a CV given as a file path, raw bytes or a binary file-like object.
+        
+        ``file_name`` is required for in-memory sources so the format can be detected.
+        """
+        self.file_path = source if isinstance(source, str) else None
+        self.file_name = file_name or os.path.basename(self.file_path or getattr(source, 'name', '') or '')
+        self.raw_text = read_any(source, self.file_name)
         self.year_mentions = extract_year_mentions(self.raw_text)
+        self._keyword_results = {}
+    
+    @cached_property
+    def word_counts(self):
+        # Only the counts are kept; the token list is dropped after counting
+        return Counter(tokenize(self.raw_text))
+    
+    @cached_property
+    def text_lower(self):
+        # Lowercased once and shared by every keyword scan on this CV
+        return self.raw_text.lower()
+    
+    @cached_property
+    def most_common_20(self):
+        return self.word_counts.most_common(20)
         
     def get_summary(self):
         return {
             'file_name': self.file_name,
-            'total_words': len(self.tokens),
-            'unique_words': len(set(self.tokens)),
+            'total_words': sum(self.word_counts.values()),
+            'unique_words': len(self.word_counts),
             'raw_text_length': len(self.raw_text),
             'years_mentioned': len(self.year_mentions)
         }
     
-    def generate_word_cloud_figure(self, max_words=300, width=1600, height=900):
-        """Generate word cloud and return matplotlib figure"""
-        wc_stop = STOPWORDS.union(EN_STOP).union({w.lower() for w in CUSTOM_STOP})
-        
-        cloud = WordCloud(
-            width=width, height=height,
-            background_color="white",
-            max_words=max_words,
-            collocations=False,
-            stopwords=wc_stop
-        ).generate(" ".join(self.tokens))
-        
-        fig, ax = plt.subplots(figsize=(16, 9))
-        ax.imshow(cloud, interpolation="bilinear")
-        ax.axis("off")
-        ax.set_title(f"Word Cloud — {self.file_name}", fontsize=16, pad=20)
-        plt.tight_layout()
-        
-        return fig
+    def word_cloud_data(self, max_words=300, width=1600, height=900):
+        """Data needed to render the word cloud"""
+        return {
+            'frequencies': dict(islice(
+                ((word, count) for word, count in self.word_counts.most_common() if word not in _WC_STOP),
+                max_words
+            )),
+            'file_name': self.file_name,
+            'max_words': max_words,
+            'width': width,
+            'height': height
+        }
     
-    def plot_top_words_figure(self, n=20):
-        """Generate top words chart and return matplotlib figure"""
-        top_words = self.word_counts.most_common(n)
-        words = [word for word, count in top_words]
-        counts = [count for word, count in top_words]
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        bars = ax.bar(range(len(words)), counts, color='skyblue')
-        ax.set_xlabel("Words", fontsize=12)
-        ax.set_ylabel("Frequency", fontsize=12)
-        ax.set_title(f"Top {n} Words in {self.file_name}", fontsize=14)
-        ax.set_xticks(range(len(words)))
-        ax.set_xticklabels(words, rotation=45, ha="right")
-        
-        # Add value labels on bars
-        for bar, count in zip(bars, counts):
-            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
-                   str(count), ha='center', va='bottom')
-        
-        plt.tight_layout()
-        return fig
+    def top_words_data(self, n=20):
+        """Data needed to render the top words chart"""
+        top_words = self.most_common_20[:n] if n <= 20 else self.word_counts.most_common(n)
+        words, counts = zip(*top_words) if top_words else ((), ())
+        return {
+            'words': words,
+            'counts': counts,
+            'n': n,
+            'file_name': self.file_name
+        }
     
-    def plot_year_mentions_figure(self):
-        """Generate year mentions chart and return matplotlib figure"""
+    def year_mentions_data(self):
+        """Data needed to render the year mentions chart, or None if no years"""
         if not self.year_mentions:
             return None
         
         year_counts = Counter(self.year_mentions)
         years = sorted(year_counts.keys())
-        counts = [year_counts[year] for year in years]
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        ax.plot(years, counts, marker='o', linewidth=2, markersize=8, color='orange')
-        ax.set_xlabel("Year", fontsize=12)
-        ax.set_ylabel("Number of Mentions", fontsize=12)
-        ax.set_title(f"Year Mentions in {self.file_name}", fontsize=14)
-        ax.grid(True, alpha=0.3)
-        
-        # Add value labels on points
-        for year, count in zip(years, counts):
-            ax.text(year, count + 0.1, str(count), ha='center', va='bottom')
-        
-        plt.tight_layout()
-        return fig
+        return {
+            'years': years,
+            'counts': [year_counts[year] for year in years],
+            'file_name': self.file_name
+        }
     
     def analyze_keywords_data(self, keyword_lists):
-        """Analyze keyword frequency and return data"""
-        def count_keywords(text: str, keywords: list):
-            text_lower = text.lower()
-            counts = {}
-            for keyword in keywords:
-                pattern = r"\b" + re.escape(keyword.lower()) + r"\b"
-                counts[keyword] = len(re.findall(pattern, text_lower))
-            return counts
+        """Analyze keyword frequency and return data (memoized per keyword set)"""
+        frozen = _freeze_keywords(keyword_lists)
+        if frozen in self._keyword_results:
+            return self._keyword_results[frozen]
         
-        results = {}
-        for category, keywords in keyword_lists.items():
-            results[category] = count_keywords(self.raw_text, keywords)
+        results = {category: {keyword: 0 for keyword in keywords}
+                   for category, keywords in keyword_lists.items()}
+        self._keyword_results[frozen] = results
+        automaton = _keyword_automaton(frozen)
+        if not len(automaton):
+            return results
+        
+        # Single pass over the text. Word boundaries are enforced only on
+        # alphanumeric phrase ends, unlike the old \b...\b regex, so "c++"/"c#"
+        # now match (the old patterns needed a word character after "+"/"#")
+        text_lower = self.text_lower
+        last = len(text_lower) - 1
+        for end, (phrase, targets) in automaton.iter(text_lower):
+            start = end - len(phrase) + 1
+            if _is_word_char(phrase[0]) and start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            if _is_word_char(phrase[-1]) and end < last and _is_word_char(text_lower[end + 1]):
+                continue
+            for category, keyword in targets:
+                results[category][keyword] += 1
         
         return results
     
-    def plot_keywords_figure(self, keyword_lists):
-        """Generate keyword analysis chart and return matplotlib figure"""
-        results = self.analyze_keywords_data(keyword_lists)
+    def keywords_chart_data(self, keyword_lists, results=None):
+        """Data needed to render the keyword chart, or None if nothing matched"""
+        if results is None:
+            results = self.analyze_keywords_data(keyword_lists)
         
         all_keywords = []
         all_counts = []
@@ -232,36 +381,64 @@ class CVAnalyzer:
         
         if not sorted_data:
             return None
-            
-        sorted_keywords, sorted_counts = zip(*sorted_data)
         
-        fig, ax = plt.subplots(figsize=(12, max(8, len(sorted_keywords) * 0.4)))
-        bars = ax.barh(range(len(sorted_keywords)), sorted_counts, color='lightcoral')
-        ax.set_xlabel("Frequency", fontsize=12)
-        ax.set_ylabel("Keywords", fontsize=12)
-        ax.set_title(f"Keyword Analysis for {self.file_name}", fontsize=14)
-        ax.set_yticks(range(len(sorted_keywords)))
-        ax.set_yticklabels(sorted_keywords)
-        ax.invert_yaxis()
+        sorted_keywords, sorted_counts = zip(*sorted_data)
+        return {
+            'keywords': list(sorted_keywords),
+            'counts': list(sorted_counts),
+            'file_name': self.file_name
+        }
+    
+    def generate_word_cloud_figure(self, max_words=300, width=1600, height=900):
+        """Generate word cloud and return matplotlib figure"""
+        return plot_word_cloud(self.word_cloud_data(max_words, width, height))
+    
+    def plot_top_words_figure(self, n=20):
+        """Generate top words chart and return matplotlib figure"""
+        return plot_top_words(self.top_words_data(n))
+    
+    def plot_year_mentions_figure(self):
+        """Generate year mentions chart and return matplotlib figure"""
+        data = self.year_mentions_data()
+        return plot_year_mentions(data) if data else None
+    
+    def plot_keywords_figure(self, keyword_lists, results=None):
+        """Generate keyword analysis chart and return matplotlib figure"""
+        data = self.keywords_chart_data(keyword_lists, results)
+        return plot_keywords(data) if data else None
+    
+    def get_ai_analysis(self, api_key=None, cache=None, cache_expire=None, request_timeout=None):
+        """Generate AI-powered insights about the candidate
         
-        # Add value labels
-        for i, count in enumerate(sorted_counts):
-            ax.text(count + 0.1, i, str(count), va='center')
+        Returns ``(insights, is_fallback)``; ``is_fallback`` is True when the
+        mock insights were used (no API key, API error or unparseable reply).
+        If a ``cache`` with get/set (e.g. diskcache.Cache) is given, successful
+        responses are stored under the model and a hash of the prompt text,
+        expiring after ``cache_expire`` seconds if given.
         
-        plt.tight_layout()
-        return fig
-    
-    def get_ai_analysis(self, api_key=None):
-        """Generate AI-powered insights about the candidate"""
+        ``request_timeout`` bounds the OpenAI call itself (with no retries), so a
+        caller that stops waiting doesn't leave a thread stuck on the API.
+        """
         if not api_key:
             # Return mock data if no API key provided
-            return self._get_mock_ai_analysis()
+            return self.get_mock_ai_analysis(), True
+        
+        # Truncate text if too long (OpenAI has token limits)
+        text_sample = self.raw_text[:4000] if len(self.raw_text) > 4000 else self.raw_text
+        
+        cache_key = None
+        if cache is not None:
+            text_hash = hashlib.blake2b(text_sample.encode('utf-8'), digest_size=16).hexdigest()
+            cache_key = f"ai:{AI_MODEL}:{text_hash}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached, False
         
         try:
-            client = openai.OpenAI(api_key=api_key)
-            
-            # Truncate text if too long (OpenAI has token limits)
-            text_sample = self.raw_text[:4000] if len(self.raw_text) > 4000 else self.raw_text
+            client_options = {}
+            if request_timeout is not None:
+                client_options = {'timeout': request_timeout, 'max_retries': 0}
+            client = openai.OpenAI(api_key=api_key, **client_options)
             
             prompt = f"""
             Analyze this CV/Resume and provide insights for HR professionals. 
@@ -291,7 +468,7 @@ class CVAnalyzer:
             """
             
             response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
+                model=AI_MODEL,
                 messages=[
                     {"role": "system", "content": "You are an expert HR analyst. Provide objective, practical insights about candidates based on their CVs."},
                     {"role": "user", "content": prompt}
@@ -303,16 +480,18 @@ class CVAnalyzer:
             # Parse JSON response
             try:
                 ai_insights = json.loads(response.choices[0].message.content)
-                return ai_insights
+                if cache_key is not None:
+                    cache.set(cache_key, ai_insights, expire=cache_expire)
+                return ai_insights, False
             except json.JSONDecodeError:
                 # Fallback if JSON parsing fails
-                return self._get_mock_ai_analysis()
+                return self.get_mock_ai_analysis(), True
                 
         except Exception as e:
             print(f"AI Analysis error: {e}")
-            return self._get_mock_ai_analysis()
+            return self.get_mock_ai_analysis(), True
     
-    def _get_mock_ai_analysis(self):
+    def get_mock_ai_analysis(self):
         """Fallback mock data when AI is not available"""
         return {
             "professional_summary": "Experienced professional with diverse background. Analysis shows strong technical and communication skills based on CV content.",